@@ -1,94 +1,161 @@
 # Standard libs
+import hashlib
+import io
 import logging
+import multiprocessing
+import os
 import subprocess
 import re
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager, redirect_stderr
+from functools import lru_cache
+from itertools import chain, islice, repeat
 from pathlib import Path
 
 # Third-party
+import anyio.to_thread
 from fastapi import FastAPI, Request, Query, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from lxml import etree
-from lxml.etree import _Element
+from markupsafe import Markup, escape
 
-# Local
-import uvicorn
 
+# Worker threads available to the sync endpoints, which do lxml and filesystem work
+THREADPOOL_TOKENS = 128
 
-app = FastAPI(title="YANG Path Browser 2.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_TOKENS
+    # Daemon thread so startup is not blocked by preprocessing; the teardown
+    # below cancels queued pyang jobs and stops their workers
+    threading.Thread(target=process_all_releases, daemon=True).start()
+    yield
+    shutdown_preprocessing()
+
+
+app = FastAPI(title="YANG Path Browser 2.0", lifespan=lifespan)
 templates = Jinja2Templates(directory="templates")
 
+
+def highlight_match(text: str, q: str) -> Markup:
+    """Escape text and wrap every occurrence of q in a highlight span."""
+    marker = Markup("<span style='color:red;font-weight:bold'>{}</span>").format(q)
+    return marker.join(text.split(q))
+
+
+templates.env.filters["highlight"] = highlight_match
+
 yang_models_base_path = Path("7x50_YangModels")
 flat_dir = Path("flat")
 flat_dir.mkdir(exist_ok=True)
 
-release_folders = sorted(
-    [folder.name for folder in yang_models_base_path.iterdir() if folder.is_dir() and not folder.name.startswith(".")],
-    reverse=True
-)
+# Files preprocess_release_if_needed leaves in flat/<release>
+REQUIRED_FLAT_FILES = {
+    "nokia-conf-flat-paths.txt",
+    "nokia-state-flat-paths.txt",
+    "nokia-conf-pyang.yin",
+    "nokia-state-pyang.yin",
+}
+
+
+def list_release_folders(base_path: Path) -> list[str]:
+    """Release folder names, newest first. DirEntry.is_dir() reuses the d_type from the directory scan."""
+    try:
+        with os.scandir(base_path) as entries:
+            return sorted((e.name for e in entries if e.is_dir() and not e.name.startswith(".")), reverse=True)
+    except FileNotFoundError:
+        # e.g. the --yang-dir CLI run from a directory without 7x50_YangModels
+        return []
+
+
+def has_preprocessed_files(release: str) -> bool:
+    """Check for all REQUIRED_FLAT_FILES with a single directory scan."""
+    try:
+        with os.scandir(flat_dir / release) as entries:
+            names = {e.name for e in entries}
+    except FileNotFoundError:
+        return False
+    return REQUIRED_FLAT_FILES <= names
+
+
+release_folders = list_release_folders(yang_models_base_path)
 
 release_load_status = {}
-flat_paths = {}
-loaded_model = {}
+release_status_lock = threading.Lock()
+preprocess_lock = threading.Lock()
+preprocess_stop = threading.Event()
+_preprocess_pool: ProcessPoolExecutor | None = None
+# In-process pyang runs swap sys.argv and sys.stderr, so only one may run at a time
+pyang_lock = threading.Lock()
+_pyang_initialised = False
+
+# Loaded models per release, kept across requests and reloaded only when the
+# preprocessed files on disk change. Models map every resolvable path to its record.
+_model_cache: dict[str, dict[str, dict[str, dict]]] = {}
+_flat_cache: dict[str, dict[str, tuple[bytes, ...]]] = {}
+_mtime_cache: dict[str, dict[str, float]] = {}
+# One lock per release so concurrent requests parse a release only once
+_load_locks: dict[str, threading.Lock] = {}
+
+YIN_NS = "{urn:ietf:params:xml:ns:yang:yin:1}"
+TAG_CONTAINER = YIN_NS + "container"
+TAG_LIST = YIN_NS + "list"
+TAG_KEY = YIN_NS + "key"
+TAG_TYPE = YIN_NS + "type"
+TAG_DESCRIPTION_TEXT = f"{YIN_NS}description/{YIN_NS}text"
+
+# Module prefix and list key predicates stripped by normalize_path
+_PREFIX_RE = re.compile(r"^(nokia-(conf|state)[:/])")
+_KEY_RE = re.compile(r"\[[^\]]+\]")
+
+# Schema nodes that make up YANG paths; choice and case are not path segments
+DATA_NODE_TAGS = {YIN_NS + tag for tag in (
+    "container", "list", "leaf", "leaf-list", "anydata", "anyxml", "action", "rpc", "notification",
+)}
 
 combined_files = {
     "state": "nokia-combined/nokia-state.yang",
     "conf": "nokia-combined/nokia-conf.yang"
 }
 
+# Flat-path buffers are split into this many shards and scanned in parallel. bytes.find
+# holds the GIL, so this only pays off on free-threaded CPython builds.
+SEARCH_SHARDS = 1 if getattr(sys, "_is_gil_enabled", lambda: True)() else (os.cpu_count() or 1)
+# Buffers smaller than this are always scanned in one piece
+SHARD_MIN_BYTES = 4 * 1024 * 1024
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_SHARDS) if SEARCH_SHARDS > 1 else None
+
+# Shorter queries match most of the corpus and are not searched
+MIN_QUERY_LENGTH = 2
+# Search results rendered per page
+MAX_RESULTS = 500
+
+# Seconds browsers may reuse a details page before revalidating it with its ETag
+DETAILS_MAX_AGE = 300
+
 app.mount("/flat", StaticFiles(directory="flat"), name="flat")
 
 def initialize_release_statuses():
     for release in release_folders:
-        flat_subdir = flat_dir / release
-        required_files = [
-            flat_subdir / "nokia-conf-flat-paths.txt",
-            flat_subdir / "nokia-state-flat-paths.txt",
-            flat_subdir / "nokia-conf-pyang.yin",
-            flat_subdir / "nokia-state-pyang.yin"
-        ]
-        release_load_status[release] = "ok" if all(f.exists() for f in required_files) else "pending"
+        status = "ok" if has_preprocessed_files(release) else "pending"
+        with release_status_lock:
+            release_load_status[release] = status
 
 initialize_release_statuses()
 
-@app.on_event("startup")
-async def startup_tasks():
-    def process_all_releases():
-        for release in release_folders:
-            if release_load_status.get(release) == "ok":
-                continue
-            try:
-                preprocess_release_if_needed(release)
-                release_load_status[release] = "ok"
-            except Exception as e:
-                logging.error(f"Failed to preprocess {release}: {e}")
-                release_load_status[release] = f"error: {e}"
-
-    import threading
-    threading.Thread(target=process_all_releases, daemon=True).start()
-
-
 def ensure_flattened_releases():
     print("🔍 Scanning for missing flattened YANG data...")
     missing = []
-    for release_path in sorted(yang_models_base_path.iterdir(), reverse=True):
-        if not release_path.is_dir():
-            continue
-        release = release_path.name
-        flat_subdir = flat_dir / release
-        required_files = [
-            flat_subdir / "nokia-conf-flat-paths.txt",
-            flat_subdir / "nokia-state-flat-paths.txt",
-            flat_subdir / "nokia-conf-pyang.yin",
-            flat_subdir / "nokia-state-pyang.yin"
-        ]
-        if not flat_subdir.exists() or not all(f.exists() for f in required_files):
+    for release in list_release_folders(yang_models_base_path):
+        if not has_preprocessed_files(release):
             print(f"❌ Missing files for {release}, triggering flatten/load.")
             missing.append(release)
-            flat_subdir.mkdir(parents=True, exist_ok=True)
-            flatten_yang_models(release_path, flat_subdir)
-            load_yang_model(release_path, flat_subdir)
+            preprocess_release_if_needed(release)
         else:
             print(f"✅ {release} already preprocessed.")
     print("📦 Flattening complete.")
@@ -128,62 +195,196 @@ def get_combined_file_paths(release_path: Path) -> dict:
 
     raise FileNotFoundError(f"Could not find combined or legacy state/conf YANG in {release_path}")
 
-def get_current_loaded_release() -> str:
-    for name in release_folders:
-        expected = flat_dir / name / "nokia-state-pyang.yin"
-        if expected.exists():
-            return name
-    return release_folders[0]  # fallback
+def process_all_releases():
+    """Preprocess all pending releases, running every (release, model) pyang job in its own worker process."""
+    global _preprocess_pool
+    with preprocess_lock:
+        # A stop requested for an earlier pass (e.g. a previous lifespan) must not cancel this one
+        preprocess_stop.clear()
+        try:
+            _process_all_releases()
+        finally:
+            _preprocess_pool = None
+
+def _process_all_releases():
+    global _preprocess_pool
+    jobs = {}
+    # spawn rather than fork: the server process already runs other threads
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")) as pool:
+        _preprocess_pool = pool
+        for release in release_folders:
+            if preprocess_stop.is_set():
+                return
+            if release_load_status.get(release) == "ok":
+                continue  # Already preprocessed
+            try:
+                stale = stale_models(release)
+                # One hash per release, shared by its model jobs
+                input_hash = hash_yang_inputs(yang_models_base_path / release) if stale else None
+            except Exception as e:
+                logging.error(f"Failed to preprocess {release}: {e}")
+                with release_status_lock:
+                    release_load_status[release] = f"error: {e}"
+                continue
+            jobs[release] = [
+                pool.submit(preprocess_model_if_needed, release, key, rel_path, input_hash)
+                for key, rel_path in stale.items()
+            ]
+
+        for release, futures in jobs.items():
+            try:
+                for future in futures:
+                    future.result()
+                status = "ok"
+            except Exception as e:
+                if preprocess_stop.is_set():
+                    return  # Cancelled by shutdown_preprocessing, not a real failure
+                logging.error(f"Failed to preprocess {release}: {e}")
+                status = f"error: {e}"
+            with release_status_lock:
+                release_load_status[release] = status
+
+def shutdown_preprocessing():
+    """Cancel queued pyang jobs and stop the worker processes of a running preprocessing pass."""
+    preprocess_stop.set()
+    pool = _preprocess_pool
+    if pool is None:
+        return
+    # shutdown() forgets the worker handles, so grab them first. ProcessPoolExecutor has no
+    # public way to stop running jobs; _processes is CPython implementation detail
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    # Running jobs are not cancelled by shutdown(); terminate their workers for a hard stop
+    for process in processes:
+        process.terminate()
 
 def preprocess_release_if_needed(release_name: str):
+    stale = stale_models(release_name)
+    if not stale:
+        return
+    input_hash = hash_yang_inputs(yang_models_base_path / release_name)
+    for key, rel_path in stale.items():
+        preprocess_model_if_needed(release_name, key, rel_path, input_hash)
+
+def stale_models(release_name: str) -> dict[str, str]:
+    """The models of a release (key -> YANG path) whose outputs are missing or older than the model."""
+    release_yang_path = yang_models_base_path / release_name
+    flat_release_path = flat_dir / release_name
+    stale = {}
+    for key, rel_path in get_combined_file_paths(release_yang_path).items():
+        yang_mtime = (release_yang_path / rel_path).stat().st_mtime
+        outputs = (flat_release_path / f"nokia-{key}-flat-paths.txt", flat_release_path / f"nokia-{key}-pyang.yin")
+        if not all(f.exists() and f.stat().st_mtime >= yang_mtime for f in outputs):
+            stale[key] = rel_path
+    return stale
+
+def preprocess_model_if_needed(release_name: str, key: str, rel_path: str, input_hash: str):
+    """Regenerate the outputs of a stale model unless input_hash (see hash_yang_inputs) shows the YANG is unchanged."""
     release_yang_path = yang_models_base_path / release_name
     flat_release_path = flat_dir / release_name
     flat_release_path.mkdir(parents=True, exist_ok=True)
 
-    combined_paths = get_combined_file_paths(release_yang_path)
-
-    for key, rel_path in combined_paths.items():
-        yang_file = release_yang_path / rel_path
-        flat_txt = flat_release_path / f"nokia-{key}-flat-paths.txt"
-        yin_file = flat_release_path / f"nokia-{key}-pyang.yin"
+    yang_file = release_yang_path / rel_path
+    flat_txt = flat_release_path / f"nokia-{key}-flat-paths.txt"
+    yin_file = flat_release_path / f"nokia-{key}-pyang.yin"
+
+    hash_file = flat_release_path / f"nokia-{key}.sha256"
+    outputs = (flat_txt, yin_file)
+
+    # mtimes also change on a checkout or copy, so compare the YANG content before rerunning pyang
+    if all(f.exists() for f in outputs) and hash_file.exists() and hash_file.read_text().strip() == input_hash:
+        logging.info(f"✅ YANG content unchanged for {release_name} {key}, skipping pyang")
+        for f in outputs:
+            f.touch()
+        return
+
+    logging.info(f"🔁 Regenerating flatten for {release_name} {key}")
+    cmd_flat = [
+        "pyang", "-f", "flatten",
+        "-p", str(release_yang_path),
+        "-p", str(release_yang_path / "ietf"),
+        "-p", str(release_yang_path / "nokia-submodule"),
+        str(yang_file)
+    ]
+    run_pyang_to_file(cmd_flat, flat_txt, f"pyang flatten error for {yang_file}")
+
+    logging.info(f"🔁 Regenerating YIN for {release_name} {key}")
+    cmd_yin = [
+        "pyang", "-f", "yin",
+        "-p", str(release_yang_path),
+        "-p", str(release_yang_path / "ietf"),
+        "-p", str(release_yang_path / "nokia-submodule"),
+        str(yang_file)
+    ]
+    run_pyang_to_file(cmd_yin, yin_file, f"pyang YIN error for {yang_file}")
+
+    hash_file.write_text(input_hash + "\n")
+
+def hash_yang_inputs(release_yang_path: Path) -> str:
+    """SHA-256 over the relative path and content of every .yang file pyang can pick up for a release."""
+    digest = hashlib.sha256()
+    for yang_file in sorted(release_yang_path.rglob("*.yang")):
+        digest.update(yang_file.relative_to(release_yang_path).as_posix().encode())
+        digest.update(hashlib.sha256(yang_file.read_bytes()).digest())
+    return digest.hexdigest()
+
+def run_pyang_to_file(cmd: list[str], out_file: Path, error_message: str):
+    """Run pyang with its output written to out_file, replacing it only on success."""
+    tmp_file = out_file.with_name(f"{out_file.name}.{os.getpid()}.tmp")
+    result = run_pyang_in_process(cmd[1:], tmp_file)
+    if result is None:
+        with open(tmp_file, "wb") as f:
+            completed = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE)
+        result = completed.returncode, completed.stderr.decode(errors="replace")
+    returncode, stderr = result
+    if returncode != 0:
+        tmp_file.unlink(missing_ok=True)
+        # pyang's own temp file for -o, left behind if it failed before cleaning up
+        tmp_file.with_name(f"{tmp_file.name}.tmp").unlink(missing_ok=True)
+        raise RuntimeError(f"{error_message}:\n{stderr}")
+    tmp_file.replace(out_file)
+
+def run_pyang_in_process(args: list[str], out_file: Path) -> tuple[int, str] | None:
+    """Run pyang's command line entry point in this process, saving the interpreter start
+    and module imports a subprocess pays on every call. Returns None when pyang cannot be imported.
+    """
+    try:
+        from pyang import plugin
+        from pyang.scripts.pyang_tool import run
+    except ImportError:
+        return None
 
-        if not flat_txt.exists() or flat_txt.stat().st_mtime < yang_file.stat().st_mtime:
-            logging.info(f"🔁 Regenerating flatten for {release_name} {key}")
-            cmd_flat = [
-                "pyang", "-f", "flatten",
-                "-p", str(release_yang_path),
-                "-p", str(release_yang_path / "ietf"),
-                "-p", str(release_yang_path / "nokia-submodule"),
-                str(yang_file)
-            ]
-            result = subprocess.run(cmd_flat, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            if result.returncode != 0:
-                raise RuntimeError(f"pyang flatten error for {yang_file}:\n{result.stderr}")
-            with open(flat_txt, "w") as f:
-                f.write(result.stdout)
-
-        if not yin_file.exists() or yin_file.stat().st_mtime < yang_file.stat().st_mtime:
-            logging.info(f"🔁 Regenerating YIN for {release_name} {key}")
-            cmd_yin = [
-                "pyang", "-f", "yin",
-                "-p", str(release_yang_path),
-                "-p", str(release_yang_path / "ietf"),
-                "-p", str(release_yang_path / "nokia-submodule"),
-                str(yang_file)
-            ]
-            result = subprocess.run(cmd_yin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            if result.returncode != 0:
-                raise RuntimeError(f"pyang YIN error for {yang_file}:\n{result.stderr}")
-            with open(yin_file, "w") as f:
-                f.write(result.stdout)
+    global _pyang_initialised
+    stderr = io.StringIO()
+    with pyang_lock:
+        if not _pyang_initialised:
+            # run() calls plugin.init() every time, and the plugin init functions keep adding
+            # grammar rules, validation functions and error codes; register everything once
+            plugin.init()
+            plugin.init = lambda plugindirs=None: None
+            _pyang_initialised = True
+        saved_argv = sys.argv
+        sys.argv = ["pyang", "-o", str(out_file), *args]
+        try:
+            with redirect_stderr(stderr):
+                run()
+            returncode = 0
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception as e:
+            stderr.write(f"{type(e).__name__}: {e}\n")
+            returncode = 1
+        finally:
+            sys.argv = saved_argv
+    return returncode, stderr.getvalue()
 
 def load_release_to_memory(release_name: str):
-    global flat_paths, loaded_model
-    flat_paths.clear()
-    loaded_model.clear()
     flat_release_path = flat_dir / release_name
     logging.info(f"🔃 Loading release into memory: {release_name}")
 
+    models = {}
+    flats = {}
+    mtimes = {}
     for key in combined_files:
         flat_txt = flat_release_path / f"nokia-{key}-flat-paths.txt"
         yin_file = flat_release_path / f"nokia-{key}-pyang.yin"
@@ -191,62 +392,142 @@ def load_release_to_memory(release_name: str):
         if not flat_txt.exists() or not yin_file.exists():
             raise FileNotFoundError(f"Missing preprocessed files for {release_name} {key}")
 
-        # Load paths
-        with open(flat_txt) as f:
-            flat_paths[key] = [line.strip() for line in f if "/" in line]
-
-        # Load parsed YIN
-        tree = etree.parse(str(yin_file))
-        loaded_model[key] = tree
-
-@app.on_event("startup")
-async def startup_tasks():
-    def process_all_releases():
-        for release in release_folders:
-            if release_load_status.get(release) == "ok":
-                continue  # Already preprocessed
-            try:
-                preprocess_release_if_needed(release)
-                release_load_status[release] = "ok"
-            except Exception as e:
-                logging.error(f"Failed to preprocess {release}: {e}")
-                release_load_status[release] = f"error: {e}"
+        # Load paths (deduplicated, sorted and joined into one ASCII buffer searched on every request)
+        with open(flat_txt, "rb") as f:
+            flats[key] = shard_buffer(b"\n".join(sorted({line.strip() for line in f if b"/" in line})), SEARCH_SHARDS)
+
+        # Load path records from the YIN
+        models[key] = load_yin_records(yin_file)
+        mtimes[key] = yin_file.stat().st_mtime
+
+    # _model_cache last: readers treat its entry as the release being fully loaded
+    _mtime_cache[release_name] = mtimes
+    _flat_cache[release_name] = flats
+    _model_cache[release_name] = models
+    _details_for.cache_clear()
+
+def load_yin_records(yin_file: Path) -> dict[str, dict]:
+    """Stream a YIN file into one record per resolvable path (e.g. "/state/system"), never keeping the DOM."""
+    records = {}
+    # (path, list_paths) per open element; path is None where the element is not reachable by a path
+    stack = []
+    for event, element in etree.iterparse(str(yin_file), events=("start", "end"), remove_blank_text=True, remove_comments=True):
+        if event == "start":
+            path, list_paths = None, ()
+            name = element.get("name")
+            if stack and name and element.tag in DATA_NODE_TAGS:
+                parent_path, parent_list_paths = stack[-1]
+                if parent_path is not None:
+                    path, list_paths = f"{parent_path}/{name}", parent_list_paths
+                elif len(stack) == 1 and element.tag == TAG_CONTAINER:
+                    path = f"/{name}"
+                if path is not None and element.tag == TAG_LIST:
+                    list_paths = (*list_paths, path)
+            stack.append((path, list_paths))
+            continue
 
-    import threading
-    threading.Thread(target=process_all_releases, daemon=True).start()
+        path, list_paths = stack.pop()
+        if path is not None:
+            description = element.findtext(TAG_DESCRIPTION_TEXT)
+            type_node = element.find(TAG_TYPE)
+            key_node = element.find(TAG_KEY)
+            records.setdefault(path, {
+                "kind": etree.QName(element).localname,
+                "description": description.strip() if description is not None else None,
+                "type": type_node.get("name") if type_node is not None else None,
+                "key": key_node.get("value") if key_node is not None else None,
+                # List nodes on the path, this node included, for the gNMI key predicates
+                "list_paths": list_paths,
+            })
 
+        # Everything below a finished data node or top-level statement has been read
+        if element.tag in DATA_NODE_TAGS or len(stack) == 1:
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                parent.remove(element)
+    return records
+
+def shard_buffer(buffer: bytes, shards: int) -> tuple[bytes, ...]:
+    """Split a newline-joined buffer into roughly equal parts on line boundaries."""
+    if shards <= 1 or len(buffer) < SHARD_MIN_BYTES:
+        return (buffer,)
+    parts = []
+    step = len(buffer) // shards
+    start = 0
+    while start < len(buffer):
+        end = buffer.find(b"\n", start + step)
+        if end == -1:
+            end = len(buffer)
+        parts.append(buffer[start:end])
+        start = end + 1
+    return tuple(parts)
+
+def search_flat_path_shards(shards: tuple[bytes, ...], q: str, limit: int | None = None) -> list[str]:
+    """search_flat_paths over every shard, in parallel when there is more than one."""
+    if len(shards) == 1:
+        return search_flat_paths(shards[0], q, limit)
+    matches = chain.from_iterable(_search_pool.map(search_flat_paths, shards, repeat(q), repeat(limit)))
+    return list(islice(matches, limit))
+
+def search_flat_paths(buffer: bytes, q: str, limit: int | None = None) -> list[str]:
+    """Return the lines of a newline-joined path buffer that contain q, in buffer order, stopping after limit."""
+    qb = q.encode()
+    if not qb or b"\n" in qb:
+        return []
+    matches = []
+    pos = buffer.find(qb)
+    while pos != -1 and (limit is None or len(matches) < limit):
+        start = buffer.rfind(b"\n", 0, pos) + 1
+        end = buffer.find(b"\n", pos)
+        if end == -1:
+            end = len(buffer)
+        matches.append(buffer[start:end].decode())
+        pos = buffer.find(qb, end + 1)
+    return matches
+
+def is_release_cache_stale(release_name: str) -> bool:
+    """Check whether a cached release no longer matches its YIN files on disk."""
+    if release_name not in _model_cache:
+        return True
+    flat_release_path = flat_dir / release_name
+    for key, mtime in _mtime_cache[release_name].items():
+        yin_file = flat_release_path / f"nokia-{key}-pyang.yin"
+        if not yin_file.exists() or yin_file.stat().st_mtime != mtime:
+            return True
+    return False
+
+def get_models(release_name: str) -> tuple[dict, dict]:
+    """Return the path records and flat paths of a release, parsing only on a cache miss."""
+    if is_release_cache_stale(release_name):
+        with _load_locks.setdefault(release_name, threading.Lock()):
+            # Another request may have loaded it while we waited
+            if is_release_cache_stale(release_name):
+                load_release_to_memory(release_name)
+    return _model_cache[release_name], _flat_cache[release_name]
 
 @app.get("/", response_class=HTMLResponse)
-def home(request: Request, release: str = Query(default=release_folders[0]), model: str = "state", q: str = ""):
-    # Load release if user switches dropdown
-    current_loaded_release = get_current_loaded_release()
-    if release != current_loaded_release:
-        if release_load_status.get(release) != "ok":
-            return templates.TemplateResponse("home.html", {
-                "request": request,
-                "release_folders": release_folders,
-                "selected_release": release,
-                "model": model,
-                "q": q,
-                "result_html": f"<p style='color:red;'>Release <b>{release}</b> is still loading. Please wait...</p>",
-                "is_loaded": False,
-                "release_load_status": release_load_status,
-            })
-        else:
-            load_release_to_memory(release)
-
-    result_html = ""
-    if model in flat_paths and q:
-        matches = sorted(set(flat_paths[model]))
-        matches = [m for m in matches if q in m]
-        if matches:
-            result_html = f"<h2>Results for <b>{q}</b> in <code>{model}</code> for <b>{release}</b></h2><ul>"
-            for path in matches:
-                highlighted = path.replace(q, f"<span style='color:red;font-weight:bold'>{q}</span>")
-                result_html += f"<li><a href='/yang_details?path={path}&release={release}'>{highlighted}</a></li>"
-            result_html += "</ul>"
-        else:
-            result_html = f"<p>No results found for <b>{q}</b> in <code>{model}</code></p>"
+def home(request: Request, release: str = Query(default=release_folders[0] if release_folders else ""), model: str = "state", q: str = ""):
+    if release not in _model_cache and release_load_status.get(release) != "ok":
+        return templates.TemplateResponse("home.html", {
+            "request": request,
+            "release_folders": release_folders,
+            "selected_release": release,
+            "model": model,
+            "q": q,
+            "matches": None,
+            "is_loaded": False,
+            "release_load_status": release_load_status,
+        })
+
+    _, flat_paths = get_models(release)
+
+    matches = None
+    truncated = False
+    if model in flat_paths and len(q) >= MIN_QUERY_LENGTH:
+        matches = search_flat_path_shards(flat_paths[model], q, MAX_RESULTS + 1)
+        truncated = len(matches) > MAX_RESULTS
+        matches = matches[:MAX_RESULTS]
 
     return templates.TemplateResponse("home.html", {
         "request": request,
@@ -254,7 +535,9 @@ def home(request: Request, release: str = Query(default=release_folders[0]), mod
         "selected_release": release,
         "model": model,
         "q": q,
-        "result_html": result_html,
+        "matches": matches,
+        "truncated": truncated,
+        "min_query_length": MIN_QUERY_LENGTH,
         "is_loaded": True,
         "release_load_status": release_load_status,
     })
@@ -262,47 +545,51 @@ def home(request: Request, release: str = Query(default=release_folders[0]), mod
 @app.get("/yang_details", response_class=HTMLResponse)
 def get_yang_details(request: Request, path: str, release: str = Query(...)):
     if release not in release_folders:
-        return HTMLResponse(f"<p>Invalid release: {release}</p>", status_code=400)
-    
-    load_release_to_memory(release)
-    result = search_yang_path(loaded_model, path)
+        return HTMLResponse(f"<p>Invalid release: {escape(release)}</p>", status_code=400)
 
-    if not result or not isinstance(result, tuple) or result[0] is None:
-        return HTMLResponse(f"<p>No information found for path: <code>{path}</code></p>", status_code=404)
+    get_models(release)
+    etag_source = f"{release}:{path}:{sorted(_mtime_cache[release].items())}"
+    etag = '"' + hashlib.blake2b(etag_source.encode(), digest_size=8).hexdigest() + '"'
+    cache_headers = {"ETag": etag, "Cache-Control": f"max-age={DETAILS_MAX_AGE}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=cache_headers)
+
+    details = _details_for(release, path)
+    if details is None:
+        return HTMLResponse(f"<p>No information found for path: <code>{escape(path)}</code></p>", status_code=404)
 
-    element, resolved_path = result
-    ns = {"yin": "urn:ietf:params:xml:ns:yang:yin:1"}
+    return templates.TemplateResponse("details.html", {"request": request, **details}, headers=cache_headers)
 
-    description = element.findtext("yin:description/yin:text", default="No description available", namespaces=ns).strip()
-    type_node = element.find("yin:type", namespaces=ns)
-    type_text = type_node.get("name") if type_node is not None else "No type available"
-    element_kind = element.tag.split("}")[-1].capitalize()
+@lru_cache(maxsize=4096)
+def _details_for(release: str, path: str) -> dict | None:
+    """Build the details page fields for a path of an already loaded release."""
+    models = _model_cache[release]
+    result = search_yang_path(models, path)
+
+    if not result or not isinstance(result, tuple) or result[0] is None:
+        return None
 
-    key_node = element.find("yin:key", namespaces=ns)
-    key_text = key_node.get("value") if key_node is not None else None
+    record, resolved_path = result
+    records = models[record_model_key(resolved_path)]
+
+    description = record["description"] if record["description"] is not None else "No description available"
+    type_text = record["type"] or "No type available"
+    element_kind = record["kind"].capitalize()
+    key_text = record["key"]
 
     path_parts = resolved_path.strip("/").split("/")
     patched_parts = path_parts.copy()
-    current = element
-    while current is not None:
-        if current.tag.endswith("list"):
-            list_name = current.get("name")
-            key_node = current.find("yin:key", namespaces=ns)
-            if key_node is not None:
-                key_value = key_node.get("value")
-                try:
-                    index = patched_parts.index(list_name)
-                    patched_parts[index] = f"{list_name}[{key_value}=example]"
-                except ValueError:
-                    pass
-        current = current.getparent()
+    for list_path in record["list_paths"]:
+        key_value = records[list_path]["key"]
+        if key_value is not None:
+            index = list_path.count("/") - 1
+            patched_parts[index] = f"{patched_parts[index]}[{key_value}=example]"
 
     cleaned_parts = [part.split(":")[-1] for part in patched_parts]
     gnmi_example = "gnmic get --path /" + "/".join(cleaned_parts)
     is_partial_match = normalize_path(resolved_path) != normalize_path(path)
 
-    return templates.TemplateResponse("details.html", {
-        "request": request,
+    return {
         "path": path,
         "resolved_path": normalize_path(resolved_path),
         "is_partial_match": is_partial_match,
@@ -311,7 +598,13 @@ def get_yang_details(request: Request, path: str, release: str = Query(...)):
         "element_kind": element_kind,
         "key_text": key_text,
         "gnmi_example": gnmi_example,
-    })
+    }
+
+def record_model_key(yang_path: str) -> str | None:
+    """Model (conf/state) a path belongs to, from its top container."""
+    top_container_name = yang_path.strip("/").split("/")[0].split(":")[-1]
+    model_key_map = {"configure": "conf", "state": "state"}
+    return model_key_map.get(top_container_name)
 
 def search_yang_path(yang_models: dict, yang_path: str):
     if not yang_path or "/" not in yang_path:
@@ -321,59 +614,32 @@ def search_yang_path(yang_models: dict, yang_path: str):
 
     # Handle prefixed first element (e.g. nokia-state:state)
     top_container_name = path_parts[0].split(":")[-1]
-
-    model_key_map = {"configure": "conf", "state": "state"}
-    model_key = model_key_map.get(top_container_name)
+    model_key = record_model_key(yang_path)
 
     if model_key is None or model_key not in yang_models:
         return None
+    records = yang_models[model_key]
 
-    root = yang_models[model_key].getroot()
-    current = None
-    ns = {"yin": "urn:ietf:params:xml:ns:yang:yin:1"}
+    # Fast path: fully resolvable paths, e.g. every line of the flat-paths file
+    lookup_path = "/" + "/".join([top_container_name, *path_parts[1:]])
+    if lookup_path in records:
+        return records[lookup_path], lookup_path
 
-    for child in root:
-        if child.tag.endswith("container") and child.get("name") == top_container_name:
-            current = child
-            break
-    if current is None:
+    # Partial or keyed paths: descend as far as the path resolves
+    current = f"/{top_container_name}"
+    if current not in records:
         return None
 
-    deepest_valid = current
     for part in path_parts[1:]:
-        found = None
-        for child in current:
-            tag = child.tag.split("}")[-1]
-            name = child.get("name")
-            if not name or tag in ("choice", "case"):
-                continue
-            if name == part:
-                found = child
-                break
-        if found is None:
+        candidate = f"{current}/{part}"
+        if candidate not in records:
             break
-        current = found
-        deepest_valid = current
-
-    valid_path = flatten_path_to_element(deepest_valid)
-    if valid_path and valid_path[0] in ("nokia-state", "nokia-conf"):
-        valid_path = valid_path[1:]
+        current = candidate
 
-    return deepest_valid, "/" + "/".join(valid_path)
-
-def flatten_path_to_element(element: _Element) -> list[str]:
-    path_parts = []
-    current = element
-    while current is not None and current.get("name"):
-        path_parts.insert(0, current.get("name"))
-        current = current.getparent()
-    return path_parts
+    return records[current], current
 
 def normalize_path(p: str) -> str:
-    p = p.strip("/")
-    p = re.sub(r"^(nokia-(conf|state)[:/])", "", p)
-    p = re.sub(r"\[[^\]]+\]", "", p)
-    return p
+    return _KEY_RE.sub("", _PREFIX_RE.sub("", p.strip("/")))
 
 @app.get("/status")
 def get_status():
@@ -381,3 +647,20 @@ def get_status():
         "status": "ok",
         "release_status": release_load_status
     })
+
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="YANG Path Browser")
+    parser.add_argument("--yang-dir", type=Path, help="only flatten this release folder and exit")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.yang_dir:
+        yang_models_base_path = args.yang_dir.parent
+        preprocess_release_if_needed(args.yang_dir.name)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)